@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Compare buffered memory usage of dict, slotted, and batched usage records."""
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from inferspect.records import UsageBatch, UsageRecord  # noqa: E402
+
+TENANTS = [f"tenant-{index:03d}" for index in range(50)]
+MODELS = ["gpt-4o", "gpt-4o-mini", "claude-3-5-sonnet", "gemini-1.5-pro"]
+
+
+def make_row(index: int) -> Dict[str, Any]:
+    # Build identifiers per row, as a JSON decoder would, so the dict
+    # baseline does not get interning for free.
+    return {
+        "request_id": f"req-{index:012d}",
+        "tenant_id": "".join(TENANTS[index % len(TENANTS)]),
+        "model": "".join(MODELS[index % len(MODELS)]),
+        "timestamp": 1_700_000_000.0 + index,
+        "prompt_tokens": 100 + index % 900,
+        "completion_tokens": 20 + index % 300,
+        "cost_usd": 0.0001 * (index % 97),
+        "latency_ms": 50.0 + index % 1000,
+    }
+
+
+def build_dicts(count: int) -> List[Dict[str, Any]]:
+    return [make_row(index) for index in range(count)]
+
+
+def build_records(count: int) -> List[UsageRecord]:
+    return [UsageRecord.from_dict(make_row(index)) for index in range(count)]
+
+
+def build_batch(count: int) -> UsageBatch:
+    batch = UsageBatch()
+    for index in range(count):
+        batch.append(UsageRecord.from_dict(make_row(index)))
+    return batch
+
+
+def measure(builder: Callable[[int], Any], count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    retained = builder(count)
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del retained
+    return current / count
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark usage record memory footprint")
+    parser.add_argument("--count", type=int, default=1_000_000, help="Number of buffered records")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    results = {
+        "dict": measure(build_dicts, args.count),
+        "UsageRecord": measure(build_records, args.count),
+        "UsageBatch": measure(build_batch, args.count),
+    }
+    baseline = results["dict"]
+    print(f"Buffered records: {args.count:,}")
+    for name, per_record in results.items():
+        print(f"{name:>12}: {per_record:8.1f} bytes/record ({per_record / baseline:5.1%} of dict)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
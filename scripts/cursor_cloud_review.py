@@ -5,6 +5,7 @@ from __future__ import annotations
 import argparse
 import json
 import os
+import re
 import subprocess
 import sys
 import textwrap
@@ -18,6 +19,17 @@ DEFAULT_BASE_URL = "https://api.cursor.com"
 POLL_INTERVAL_SECONDS = 10
 MAX_WAIT_SECONDS = 900
 MAX_CHANGED_FILES = 200
+SUCCESS_STATUSES = {"FINISHED", "COMPLETED", "DONE", "SUCCESS"}
+TERMINAL_STATUSES = SUCCESS_STATUSES | {"EXPIRED"}
+FINDINGS_BLOCK_PATTERN = re.compile(r"```cursor-findings\s*\n(.*?)\n```", re.DOTALL)
+FINDINGS_INSTRUCTIONS = textwrap.dedent(
+    """
+    Finish the report with a fenced block tagged `cursor-findings` containing
+    JSON of the form {"findings": [{"id": "...", "severity": "...", "file": "...",
+    "title": "..."}], "resolved": ["<id of an earlier finding now fixed>"]}.
+    Reuse the id of an earlier finding when reporting it again.
+    """
+).strip()
 
 
 def run_command(args: List[str]) -> str:
@@ -30,17 +42,143 @@ def run_command(args: List[str]) -> str:
     return result.stdout.strip()
 
 
-def gather_changed_files(base_ref: Optional[str], head_ref: Optional[str]) -> List[str]:
-    """Return a sorted list of files changed between base and head."""
+def gather_changed_files(
+    base_ref: Optional[str], head_ref: Optional[str], *, merge_base: bool = True
+) -> List[str]:
+    """Return a sorted list of files changed between base and head.
+
+    With ``merge_base=False`` the diff runs directly from ``base_ref`` to
+    ``head_ref``, which is what incremental reviews need.
+    """
     if not head_ref:
         head_ref = "HEAD"
-    diff_range = head_ref if not base_ref else f"{base_ref}...{head_ref}"
+    separator = "..." if merge_base else ".."
+    diff_range = head_ref if not base_ref else f"{base_ref}{separator}{head_ref}"
     output = run_command(["git", "diff", "--name-only", diff_range])
     files = [line.strip() for line in output.splitlines() if line.strip()]
     unique_files = sorted(dict.fromkeys(files))
     return unique_files[:MAX_CHANGED_FILES]
 
 
+def load_previous_review(metadata_path: Optional[Path]) -> Optional[Dict[str, Any]]:
+    """Return metadata from the last successful review, if one is available."""
+    if metadata_path is None or not metadata_path.is_file():
+        return None
+    try:
+        metadata = json.loads(metadata_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as exc:
+        print(f"[cursor-cloud] Ignoring unreadable previous metadata: {exc}", file=sys.stderr)
+        return None
+    if not isinstance(metadata, dict) or not metadata.get("head_sha"):
+        return None
+    if str(metadata.get("status") or "").upper() not in SUCCESS_STATUSES:
+        return None
+    return metadata
+
+
+def resolve_incremental_base(previous: Optional[Dict[str, Any]], head_sha: Optional[str]) -> Optional[str]:
+    """Return the previously reviewed SHA if the new head builds on top of it.
+
+    Falls back to ``None`` (full review) when there is no prior review, the
+    head is unchanged, or the branch was rewritten so the old SHA is no
+    longer an ancestor of the new head.
+    """
+    if not previous or not head_sha:
+        return None
+    previous_sha = str(previous["head_sha"])
+    if previous_sha == head_sha:
+        return None
+    result = subprocess.run(
+        ["git", "merge-base", "--is-ancestor", previous_sha, head_sha],
+        check=False,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(
+            f"[cursor-cloud] {previous_sha} is not an ancestor of {head_sha}; running full review",
+            file=sys.stderr,
+        )
+        return None
+    return previous_sha
+
+
+def gather_incremental_files(
+    previous_head_sha: str, base_ref: Optional[str], head_ref: Optional[str]
+) -> List[str]:
+    """Return files changed since ``previous_head_sha`` that belong to the PR itself.
+
+    A plain ``previous..head`` diff also picks up everything merged in from
+    the base branch ("Update branch"), so the result is limited to files
+    that appear in the PR's merge-base diff.
+    """
+    pr_files = set(gather_changed_files(base_ref, head_ref))
+    delta = gather_changed_files(previous_head_sha, head_ref, merge_base=False)
+    return [path for path in delta if path in pr_files]
+
+
+def load_prior_findings(previous: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Return the previous review's findings with ids filled in and duplicates removed."""
+    findings = [
+        item for item in previous.get("findings") or [] if isinstance(item, dict) and item.get("title")
+    ]
+    return merge_findings(findings, [], [])
+
+
+def extract_findings(markdown: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Return (findings, resolved_finding_ids) from the report's findings block."""
+    match = FINDINGS_BLOCK_PATTERN.search(markdown)
+    if not match:
+        return [], []
+    try:
+        data = json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return [], []
+    if not isinstance(data, dict):
+        return [], []
+    findings: List[Dict[str, Any]] = []
+    for item in data.get("findings") or []:
+        if isinstance(item, dict) and item.get("title"):
+            finding = {
+                "severity": str(item.get("severity") or "Low"),
+                "file": str(item.get("file") or ""),
+                "title": str(item["title"]),
+            }
+            finding["id"] = str(item.get("id") or finding_id(finding))
+            findings.append(finding)
+    resolved = [str(value) for value in data.get("resolved") or [] if value]
+    return findings, resolved
+
+
+def finding_id(finding: Dict[str, Any]) -> str:
+    """Return a stable identifier for a finding based on its file and title."""
+    return f"{finding.get('file') or '-'}::{str(finding.get('title') or '').strip().lower()}"
+
+
+def merge_findings(
+    previous: List[Dict[str, Any]], new: List[Dict[str, Any]], resolved: List[str]
+) -> List[Dict[str, Any]]:
+    """Combine earlier unresolved findings with new ones, dropping resolved entries."""
+    resolved_ids = set(resolved)
+    merged: Dict[str, Dict[str, Any]] = {}
+    for finding in [*previous, *new]:
+        key = str(finding.get("id") or finding_id(finding))
+        if key in resolved_ids:
+            continue
+        merged[key] = {**finding, "id": key}
+    return list(merged.values())
+
+
+def render_findings_section(findings: List[Dict[str, Any]]) -> str:
+    if not findings:
+        return "## Outstanding Findings\n\nNo unresolved findings carried forward."
+    lines = ["## Outstanding Findings", ""]
+    for finding in findings:
+        location = f" (`{finding.get('file')}`)" if finding.get("file") else ""
+        lines.append(f"- **{finding.get('severity', 'Low')}**{location}: {finding.get('title')}")
+    return "\n".join(lines)
+
+
 def build_prompt(
     repo_url: str,
     pr_number: str,
@@ -49,8 +187,21 @@ def build_prompt(
     head_ref: Optional[str],
     head_sha: Optional[str],
     changed_files: List[str],
+    previous_head_sha: Optional[str] = None,
+    prior_findings: Optional[List[Dict[str, Any]]] = None,
 ) -> str:
     files_section = "\n".join(f"- {path}" for path in changed_files) or "(Git diff empty)"
+    if previous_head_sha:
+        prompt = _build_incremental_prompt(
+            repo_url=repo_url,
+            pr_number=pr_number,
+            head_ref=head_ref,
+            head_sha=head_sha,
+            previous_head_sha=previous_head_sha,
+            files_section=files_section,
+            prior_findings=prior_findings or [],
+        )
+        return textwrap.dedent(prompt).strip() + "\n\n" + FINDINGS_INSTRUCTIONS
     prompt = f"""
 You are Cursor Cloud GPT-5.1 Codex acting as a senior security and reliability
 engineer. Perform a holistic analysis of the repository with an emphasis on the
@@ -80,7 +231,57 @@ Objectives:
 Deliverable: Markdown with sections for Summary, Critical Findings, High
 Findings, Additional Observations, and Suggested Follow-up Tests.
 """
-    return textwrap.dedent(prompt).strip()
+    return textwrap.dedent(prompt).strip() + "\n\n" + FINDINGS_INSTRUCTIONS
+
+
+def _build_incremental_prompt(
+    repo_url: str,
+    pr_number: str,
+    head_ref: Optional[str],
+    head_sha: Optional[str],
+    previous_head_sha: str,
+    files_section: str,
+    prior_findings: List[Dict[str, Any]],
+) -> str:
+    findings_section = (
+        "\n".join(
+            f"- [{finding.get('id') or finding_id(finding)}] {finding.get('severity', 'Low')}: {finding.get('title')}"
+            + (f" ({finding.get('file')})" if finding.get("file") else "")
+            for finding in prior_findings
+        )
+        or "(none)"
+    )
+    return f"""
+You are Cursor Cloud GPT-5.1 Codex acting as a senior security and reliability
+engineer. This pull request was already reviewed at {previous_head_sha}; review
+only the follow-up changes pushed since then.
+
+Repository: {repo_url}
+Pull Request: #{pr_number}
+Head: {head_ref or 'HEAD'} ({head_sha or 'unknown'})
+Previously reviewed commit: {previous_head_sha}
+Delta under review: {previous_head_sha}..{head_sha or 'HEAD'}
+
+Files changed by this pull request since the last review (changes merged in
+from the base branch are excluded and out of scope):
+{files_section}
+
+Unresolved findings from earlier reviews:
+{findings_section}
+
+Objectives:
+1. Review only the delta above for correctness, security regressions,
+   data-leak vectors, and reliability gaps. Consult surrounding code only as
+   needed to judge the new changes.
+2. For each earlier unresolved finding, state whether the delta resolves it.
+   Do not re-report unchanged findings in the Markdown body.
+3. For each new finding, include file path(s), severity
+   (Critical/High/Medium/Low), technical rationale, and remediation guidance.
+4. Do not modify code or create commits/PRs. Produce a Markdown report only.
+
+Deliverable: Markdown with sections for Summary, New Findings, Resolved
+Findings, and Suggested Follow-up Tests.
+"""
 
 
 def create_agent(
@@ -143,7 +344,7 @@ def wait_for_report(
             )
         payload = response.json()
         status = (payload.get("status") or payload.get("state") or "").upper()
-        if status in {"FINISHED", "COMPLETED", "DONE", "SUCCESS", "EXPIRED"}:
+        if status in TERMINAL_STATUSES:
             return payload
         if status in {"FAILED", "ERROR"}:
             raise RuntimeError(
@@ -204,6 +405,10 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--head-sha", help="Head commit SHA")
     parser.add_argument("--analysis-report", default="cursor-cloud-analysis.md", help="Path to markdown report")
     parser.add_argument("--metadata-out", default="cursor-cloud-analysis.json", help="Path to metadata JSON")
+    parser.add_argument(
+        "--previous-metadata",
+        help="Metadata JSON from the last review; enables incremental review of new commits",
+    )
     parser.add_argument("--base-url", default=os.getenv("CURSOR_CLOUD_BASE_URL", DEFAULT_BASE_URL))
     parser.add_argument("--api-key", default=os.getenv("CURSOR_CLOUD_API_KEY"), help="Cursor Cloud API key")
     return parser.parse_args()
@@ -217,7 +422,17 @@ def main() -> int:
     report_path = Path(args.analysis_report)
     metadata_path = Path(args.metadata_out)
 
-    changed_files = gather_changed_files(args.base_sha or args.base_ref, args.head_sha or args.head_ref)
+    previous = load_previous_review(Path(args.previous_metadata) if args.previous_metadata else None)
+    previous_head_sha = resolve_incremental_base(previous, args.head_sha)
+    prior_findings: List[Dict[str, Any]] = []
+    if previous_head_sha and previous:
+        prior_findings = load_prior_findings(previous)
+        print(f"[cursor-cloud] Incremental review of {previous_head_sha}..{args.head_sha}")
+        changed_files = gather_incremental_files(
+            previous_head_sha, args.base_sha or args.base_ref, args.head_sha
+        )
+    else:
+        changed_files = gather_changed_files(args.base_sha or args.base_ref, args.head_sha or args.head_ref)
     prompt = build_prompt(
         repo_url=args.repo_url,
         pr_number=args.pr_number,
@@ -226,6 +441,8 @@ def main() -> int:
         head_ref=args.head_ref,
         head_sha=args.head_sha,
         changed_files=changed_files,
+        previous_head_sha=previous_head_sha,
+        prior_findings=prior_findings,
     )
     print("[cursor-cloud] Launching agent against", args.repo_url)
     agent_id = create_agent(
@@ -238,7 +455,10 @@ def main() -> int:
     print(f"[cursor-cloud] Agent {agent_id} created. Waiting for completion...")
     status_payload = wait_for_report(args.base_url, args.api_key, agent_id)
     markdown, pr_url = extract_markdown(status_payload)
+    new_findings, resolved = extract_findings(markdown)
+    findings = merge_findings(prior_findings, new_findings, resolved)
 
+    review_scope = f"changes since {previous_head_sha}" if previous_head_sha else "full pull request"
     summary_header = textwrap.dedent(
         f"""
         # 🤖 Cursor Cloud Agent Report
@@ -246,9 +466,12 @@ def main() -> int:
         *Pull Request:* #{args.pr_number}
         *Agent ID:* {agent_id}
         *Evaluated Commit:* {args.head_sha or 'HEAD'}
+        *Review Scope:* {review_scope}
         """
     ).strip()
     final_report = f"{summary_header}\n\n{markdown.strip()}\n"
+    if previous_head_sha:
+        final_report += f"\n{render_findings_section(findings)}\n"
 
     write_report(
         report_path=report_path,
@@ -259,6 +482,9 @@ def main() -> int:
             "pr_url": pr_url,
             "status": status_payload.get("status") or status_payload.get("state"),
             "changed_files": changed_files,
+            "head_sha": args.head_sha,
+            "previous_head_sha": previous_head_sha,
+            "findings": findings,
         },
     )
     print(f"[cursor-cloud] Analysis written to {report_path}")
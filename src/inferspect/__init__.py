@@ -5,7 +5,56 @@ from __future__ import annotations
 from importlib import metadata
 from importlib.metadata import PackageNotFoundError
 
-__all__ = ("get_package_version",)
+from inferspect.budget import (
+    BudgetEngine,
+    BudgetExceededError,
+    PriceTable,
+    Reservation,
+    SpendStore,
+)
+from inferspect.circuit_breaker import (
+    AllDeploymentsUnavailableError,
+    CircuitBreaker,
+    CircuitBreakerConfig,
+    CircuitMetrics,
+    CircuitPermit,
+    CircuitState,
+    Deployment,
+    FallbackRouter,
+    is_provider_failure,
+)
+from inferspect.records import (
+    IdentifierTable,
+    RequestRecord,
+    TraceEvent,
+    UsageBatch,
+    UsageRecord,
+    intern_identifier,
+)
+
+__all__ = (
+    "AllDeploymentsUnavailableError",
+    "BudgetEngine",
+    "BudgetExceededError",
+    "CircuitBreaker",
+    "CircuitBreakerConfig",
+    "CircuitMetrics",
+    "CircuitPermit",
+    "CircuitState",
+    "Deployment",
+    "FallbackRouter",
+    "IdentifierTable",
+    "PriceTable",
+    "RequestRecord",
+    "Reservation",
+    "SpendStore",
+    "TraceEvent",
+    "UsageBatch",
+    "UsageRecord",
+    "get_package_version",
+    "intern_identifier",
+    "is_provider_failure",
+)
 
 
 def get_package_version() -> str:
@@ -0,0 +1,260 @@
+"""In-memory per-tenant budget enforcement with periodic store reconciliation."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import threading
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Protocol, Tuple
+
+from inferspect.records import intern_identifier
+
+__all__ = (
+    "BudgetEngine",
+    "BudgetExceededError",
+    "PriceTable",
+    "Reservation",
+    "SpendStore",
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BudgetExceededError(RuntimeError):
+    """Raised when a request's estimated cost would exceed the tenant budget."""
+
+    def __init__(self, tenant_id: str, requested: float, available: float) -> None:
+        super().__init__(
+            f"Tenant {tenant_id} budget exceeded: requested ${requested:.6f}, "
+            f"available ${available:.6f}"
+        )
+        self.tenant_id = tenant_id
+        self.requested = requested
+        self.available = available
+
+
+class SpendStore(Protocol):
+    """Persistent source of truth for tenant budgets and spend."""
+
+    def load_budgets(self) -> Mapping[str, float]:
+        """Return the configured budget limit (USD) for each tenant."""
+        ...
+
+    def load_spend(self) -> Mapping[str, float]:
+        """Return the persisted spend total (USD) for each tenant."""
+        ...
+
+    def record_spend(self, tenant_id: str, amount: float) -> float:
+        """Atomically add ``amount`` to the tenant's spend and return the new total."""
+        ...
+
+
+def _check_amount(name: str, value: float) -> float:
+    if not (math.isfinite(value) and value >= 0):
+        raise ValueError(f"{name} must be a finite, non-negative number, got {value!r}")
+    return value
+
+
+class PriceTable:
+    """Per-token model prices precomputed for constant-time cost estimates."""
+
+    __slots__ = ("_prices", "_default")
+
+    def __init__(
+        self,
+        prices: Mapping[str, Tuple[float, float]],
+        default: Optional[Tuple[float, float]] = None,
+    ) -> None:
+        """Create a table from ``{model: (input_per_token, output_per_token)}``."""
+        self._prices: Dict[str, Tuple[float, float]] = {
+            intern_identifier(model): (float(inp), float(out)) for model, (inp, out) in prices.items()
+        }
+        self._default = default
+
+    @classmethod
+    def from_per_million(
+        cls,
+        prices: Mapping[str, Tuple[float, float]],
+        default: Optional[Tuple[float, float]] = None,
+    ) -> "PriceTable":
+        """Build a table from the per-million-token prices providers publish."""
+        scaled = {model: (inp / 1_000_000, out / 1_000_000) for model, (inp, out) in prices.items()}
+        scaled_default = None if default is None else (default[0] / 1_000_000, default[1] / 1_000_000)
+        return cls(scaled, default=scaled_default)
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        price = self._prices.get(model, self._default)
+        if price is None:
+            raise ValueError(f"No price configured for model {model!r}")
+        return prompt_tokens * price[0] + completion_tokens * price[1]
+
+
+@dataclass(slots=True)
+class Reservation:
+    """An amount held against a tenant budget until the request settles."""
+
+    tenant_id: str
+    amount: float
+    settled: bool = False
+
+
+class _TenantLedger:
+    __slots__ = ("lock", "limit", "spent", "reserved", "unsynced")
+
+    def __init__(self, limit: Optional[float]) -> None:
+        self.lock = threading.Lock()
+        self.limit = limit
+        self.spent = 0.0
+        self.reserved = 0.0
+        self.unsynced = 0.0
+
+
+class BudgetEngine:
+    """Check and reserve spend against per-tenant budgets without I/O.
+
+    ``reserve`` runs on the request path and only touches the tenant's
+    in-memory ledger. Actual costs are applied with ``settle`` once usage
+    is known, and ``reconcile`` pushes the accumulated spend to the
+    persistent store and pulls back totals written by other replicas.
+    """
+
+    def __init__(self, prices: PriceTable, default_limit: Optional[float] = None) -> None:
+        self.prices = prices
+        self.default_limit = default_limit
+        self._ledgers: Dict[str, _TenantLedger] = {}
+        self._ledgers_lock = threading.Lock()
+        self._reconcile_lock = threading.Lock()
+
+    def set_limit(self, tenant_id: str, limit: Optional[float]) -> None:
+        ledger = self._ledger(tenant_id)
+        with ledger.lock:
+            ledger.limit = limit
+
+    def estimate(self, model: str, prompt_tokens: int, max_output_tokens: int) -> float:
+        return self.prices.cost(model, prompt_tokens, max_output_tokens)
+
+    def reserve(self, tenant_id: str, amount: float) -> Reservation:
+        """Hold ``amount`` against the tenant budget or raise ``BudgetExceededError``."""
+        _check_amount("amount", amount)
+        ledger = self._ledger(tenant_id)
+        with ledger.lock:
+            if ledger.limit is not None:
+                available = ledger.limit - ledger.spent - ledger.reserved
+                if amount > available:
+                    raise BudgetExceededError(tenant_id, amount, max(available, 0.0))
+            ledger.reserved += amount
+        return Reservation(tenant_id=tenant_id, amount=amount)
+
+    def reserve_for_request(
+        self, tenant_id: str, model: str, prompt_tokens: int, max_output_tokens: int
+    ) -> Reservation:
+        return self.reserve(tenant_id, self.estimate(model, prompt_tokens, max_output_tokens))
+
+    def settle(self, reservation: Reservation, actual_cost: float) -> None:
+        """Replace a reservation with the request's actual cost."""
+        _check_amount("actual_cost", actual_cost)
+        ledger = self._ledger(reservation.tenant_id)
+        with ledger.lock:
+            if reservation.settled:
+                return
+            reservation.settled = True
+            ledger.reserved -= reservation.amount
+            ledger.spent += actual_cost
+            ledger.unsynced += actual_cost
+
+    def release(self, reservation: Reservation) -> None:
+        """Drop a reservation for a request that failed before incurring cost."""
+        self.settle(reservation, 0.0)
+
+    def available(self, tenant_id: str) -> Optional[float]:
+        ledger = self._ledger(tenant_id)
+        with ledger.lock:
+            if ledger.limit is None:
+                return None
+            return ledger.limit - ledger.spent - ledger.reserved
+
+    def snapshot(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Return current limit, spend, and reservations for every tenant."""
+        with self._ledgers_lock:
+            ledgers = list(self._ledgers.items())
+        result: Dict[str, Dict[str, Optional[float]]] = {}
+        for tenant_id, ledger in ledgers:
+            with ledger.lock:
+                result[tenant_id] = {
+                    "limit": ledger.limit,
+                    "spent": ledger.spent,
+                    "reserved": ledger.reserved,
+                }
+        return result
+
+    def reconcile(self, store: SpendStore) -> None:
+        """Flush locally settled spend to ``store`` and refresh limits and totals.
+
+        Tenants with nothing to flush take their total from one bulk
+        ``load_spend`` read. A failed write for one tenant is logged and
+        kept for the next pass; the remaining tenants are still reconciled
+        and the failure is re-raised at the end. Passes are serialized so a
+        stale ``load_spend`` snapshot cannot overwrite a newer flush.
+        """
+        with self._reconcile_lock:
+            self._reconcile(store)
+
+    def _reconcile(self, store: SpendStore) -> None:
+        for tenant_id, limit in store.load_budgets().items():
+            self.set_limit(tenant_id, limit)
+        persisted = store.load_spend()
+        with self._ledgers_lock:
+            ledgers = list(self._ledgers.items())
+        failures: Dict[str, Exception] = {}
+        for tenant_id, ledger in ledgers:
+            with ledger.lock:
+                pending = ledger.unsynced
+                ledger.unsynced = 0.0
+            if pending:
+                try:
+                    total = store.record_spend(tenant_id, pending)
+                except Exception as exc:
+                    logger.exception("Failed to record spend for tenant %s", tenant_id)
+                    failures[tenant_id] = exc
+                    with ledger.lock:
+                        ledger.unsynced += pending
+                    continue
+            elif tenant_id in persisted:
+                total = persisted[tenant_id]
+            else:
+                continue
+            with ledger.lock:
+                # Spend settled while the store call was in flight is not in
+                # ``total`` yet; keep it on top of the authoritative figure.
+                ledger.spent = total + ledger.unsynced
+        if failures:
+            first = next(iter(failures.values()))
+            raise RuntimeError(
+                f"Budget reconciliation failed for {len(failures)} tenant(s): {', '.join(failures)}"
+            ) from first
+
+    async def run_reconciliation(self, store: SpendStore, interval_seconds: float = 30.0) -> None:
+        """Reconcile with ``store`` now and then every ``interval_seconds`` until cancelled.
+
+        The first pass runs immediately so limits and persisted spend are in
+        place right after startup; await ``reconcile`` directly beforehand
+        if requests must not be served until that load has completed.
+        """
+        while True:
+            try:
+                await asyncio.to_thread(self.reconcile, store)
+            except Exception:
+                logger.exception("Budget reconciliation failed; retrying in %ss", interval_seconds)
+            await asyncio.sleep(interval_seconds)
+
+    def _ledger(self, tenant_id: str) -> _TenantLedger:
+        ledger = self._ledgers.get(tenant_id)
+        if ledger is None:
+            with self._ledgers_lock:
+                ledger = self._ledgers.get(tenant_id)
+                if ledger is None:
+                    ledger = _TenantLedger(self.default_limit)
+                    self._ledgers[intern_identifier(tenant_id)] = ledger
+        return ledger
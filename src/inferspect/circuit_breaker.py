@@ -0,0 +1,432 @@
+"""Circuit breakers and fast-fail fallback routing for upstream providers."""
+
+from __future__ import annotations
+
+import asyncio
+import enum
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from inferspect.records import intern_identifier
+
+__all__ = (
+    "AllDeploymentsUnavailableError",
+    "CircuitBreaker",
+    "CircuitBreakerConfig",
+    "CircuitMetrics",
+    "CircuitPermit",
+    "CircuitState",
+    "Deployment",
+    "FallbackRouter",
+    "is_provider_failure",
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+Clock = Callable[[], float]
+StateListener = Callable[[str, "CircuitState", "CircuitState"], None]
+
+
+class CircuitState(enum.Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class AllDeploymentsUnavailableError(RuntimeError):
+    """Raised when every deployment in a fallback chain failed or was skipped."""
+
+    def __init__(self, errors: Dict[str, BaseException]) -> None:
+        detail = ", ".join(f"{key}: {type(exc).__name__}" for key, exc in errors.items()) or "all circuits open"
+        super().__init__(f"No deployment available ({detail})")
+        self.errors = errors
+
+
+@dataclass(slots=True, frozen=True)
+class CircuitBreakerConfig:
+    """Thresholds controlling when a circuit opens and how it recovers."""
+
+    window_seconds: float = 30.0
+    bucket_count: int = 10
+    min_requests: int = 10
+    error_rate_threshold: float = 0.5
+    consecutive_failures: int = 5
+    slow_call_ms: float = 10_000.0
+    slow_call_rate_threshold: float = 0.8
+    open_seconds: float = 15.0
+    half_open_probes: int = 3
+
+
+class _RollingWindow:
+    """Fixed number of time buckets holding (total, errors, slow) counts."""
+
+    __slots__ = ("_bucket_seconds", "_starts", "_totals", "_errors", "_slow")
+
+    def __init__(self, window_seconds: float, bucket_count: int) -> None:
+        self._bucket_seconds = window_seconds / bucket_count
+        self._starts = [float("-inf")] * bucket_count
+        self._totals = [0] * bucket_count
+        self._errors = [0] * bucket_count
+        self._slow = [0] * bucket_count
+
+    def record(self, now: float, failed: bool, slow: bool) -> None:
+        start = now - now % self._bucket_seconds
+        index = int(start / self._bucket_seconds) % len(self._starts)
+        if self._starts[index] != start:
+            self._starts[index] = start
+            self._totals[index] = 0
+            self._errors[index] = 0
+            self._slow[index] = 0
+        self._totals[index] += 1
+        self._errors[index] += failed
+        self._slow[index] += slow
+
+    def counts(self, now: float) -> Tuple[int, int, int]:
+        horizon = now - self._bucket_seconds * len(self._starts)
+        total = errors = slow = 0
+        for index, start in enumerate(self._starts):
+            if start > horizon:
+                total += self._totals[index]
+                errors += self._errors[index]
+                slow += self._slow[index]
+        return total, errors, slow
+
+    def reset(self) -> None:
+        for index in range(len(self._starts)):
+            self._starts[index] = float("-inf")
+
+
+@dataclass(slots=True, frozen=True)
+class CircuitPermit:
+    """Admission ticket returned by :meth:`CircuitBreaker.allow_request`.
+
+    ``generation`` identifies the circuit state the call was admitted under;
+    outcomes reported against an older generation are ignored.
+    """
+
+    generation: int
+    probe: bool = False
+
+
+class CircuitBreaker:
+    """Track recent outcomes for one upstream and decide whether to call it.
+
+    The circuit opens after ``consecutive_failures`` failures in a row or
+    when the rolling error rate or slow-call rate crosses its threshold,
+    which catches a hard outage even while the window is still full of
+    earlier successes. An open circuit rejects calls for ``open_seconds``,
+    then lets a limited number of probe calls through. Successful probes
+    close the circuit and any failed probe reopens it.
+
+    Every state change starts a new generation, so a slow call admitted
+    before the circuit opened cannot later be mistaken for a probe result.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        config: Optional[CircuitBreakerConfig] = None,
+        *,
+        clock: Clock = time.monotonic,
+        on_state_change: Optional[StateListener] = None,
+    ) -> None:
+        self.name = intern_identifier(name)
+        self.config = config or CircuitBreakerConfig()
+        self._clock = clock
+        self._on_state_change = on_state_change
+        self._lock = threading.Lock()
+        self._window = _RollingWindow(self.config.window_seconds, self.config.bucket_count)
+        self._state = CircuitState.CLOSED
+        self._generation = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._failure_streak = 0
+        self._pending_events: List[Tuple[CircuitState, CircuitState]] = []
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            self._maybe_half_open(self._clock())
+            state = self._state
+        self._emit_events()
+        return state
+
+    def allow_request(self) -> Optional[CircuitPermit]:
+        """Return a permit if a call may proceed, claiming a probe slot if half-open."""
+        with self._lock:
+            self._maybe_half_open(self._clock())
+            permit = self._admit()
+        self._emit_events()
+        return permit
+
+    def cancel_request(self, permit: CircuitPermit) -> None:
+        """Give back a permit without recording an outcome for it."""
+        with self._lock:
+            if permit.probe and permit.generation == self._generation and self._probes_in_flight:
+                self._probes_in_flight -= 1
+
+    def record_success(self, permit: CircuitPermit, latency_ms: float) -> bool:
+        """Record a successful call; return ``False`` if the permit was stale."""
+        return self._record(permit, failed=False, latency_ms=latency_ms)
+
+    def record_failure(self, permit: CircuitPermit, latency_ms: float) -> bool:
+        """Record a failed call; return ``False`` if the permit was stale."""
+        return self._record(permit, failed=True, latency_ms=latency_ms)
+
+    def _admit(self) -> Optional[CircuitPermit]:
+        if self._state is CircuitState.CLOSED:
+            return CircuitPermit(self._generation)
+        if self._state is CircuitState.OPEN:
+            return None
+        if self._probes_in_flight + self._probe_successes >= self.config.half_open_probes:
+            return None
+        self._probes_in_flight += 1
+        return CircuitPermit(self._generation, probe=True)
+
+    def _record(self, permit: CircuitPermit, failed: bool, latency_ms: float) -> bool:
+        now = self._clock()
+        slow = latency_ms >= self.config.slow_call_ms
+        with self._lock:
+            accepted = self._apply(permit, now, failed, slow)
+        self._emit_events()
+        return accepted
+
+    def _apply(self, permit: CircuitPermit, now: float, failed: bool, slow: bool) -> bool:
+        if permit.generation != self._generation:
+            return False
+        if self._state is CircuitState.HALF_OPEN:
+            if not permit.probe:
+                return False
+            self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+            if failed or slow:
+                self._open(now)
+                return True
+            self._probe_successes += 1
+            if self._probe_successes >= self.config.half_open_probes:
+                self._window.reset()
+                self._transition(CircuitState.CLOSED)
+            return True
+        if self._state is CircuitState.OPEN:
+            return False
+        self._window.record(now, failed, slow)
+        self._failure_streak = self._failure_streak + 1 if failed else 0
+        if self._failure_streak >= self.config.consecutive_failures:
+            self._open(now)
+            return True
+        total, errors, slow_calls = self._window.counts(now)
+        if total < self.config.min_requests:
+            return True
+        if (
+            errors / total >= self.config.error_rate_threshold
+            or slow_calls / total >= self.config.slow_call_rate_threshold
+        ):
+            self._open(now)
+        return True
+
+    def _open(self, now: float) -> None:
+        self._opened_at = now
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._failure_streak = 0
+        self._transition(CircuitState.OPEN)
+
+    def _maybe_half_open(self, now: float) -> None:
+        if self._state is CircuitState.OPEN and now - self._opened_at >= self.config.open_seconds:
+            self._transition(CircuitState.HALF_OPEN)
+
+    def _transition(self, new_state: CircuitState) -> None:
+        # Called with ``_lock`` held; listeners run later from ``_emit_events``.
+        old_state = self._state
+        if old_state is new_state:
+            return
+        self._state = new_state
+        self._generation += 1
+        self._pending_events.append((old_state, new_state))
+
+    def _emit_events(self) -> None:
+        if not self._pending_events:
+            return
+        with self._lock:
+            events, self._pending_events = self._pending_events, []
+        for old_state, new_state in events:
+            logger.info("Circuit %s: %s -> %s", self.name, old_state.value, new_state.value)
+            if self._on_state_change is not None:
+                self._on_state_change(self.name, old_state, new_state)
+
+
+class CircuitMetrics:
+    """In-process counters for circuit state transitions."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.transitions: Dict[Tuple[str, str, str], int] = {}
+        self.states: Dict[str, str] = {}
+
+    def __call__(self, name: str, old_state: CircuitState, new_state: CircuitState) -> None:
+        key = (name, old_state.value, new_state.value)
+        with self._lock:
+            self.transitions[key] = self.transitions.get(key, 0) + 1
+            self.states[name] = new_state.value
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "states": dict(self.states),
+                "transitions": [
+                    {"circuit": name, "from": old, "to": new, "count": count}
+                    for (name, old, new), count in self.transitions.items()
+                ],
+            }
+
+
+@dataclass(slots=True, frozen=True)
+class Deployment:
+    """A model deployment served by a specific provider."""
+
+    provider: str
+    name: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.provider}/{self.name}"
+
+
+def is_provider_failure(exc: BaseException) -> bool:
+    """Return whether ``exc`` indicates an unhealthy upstream rather than a bad request.
+
+    Timeouts and connection errors count as failures, as do errors carrying
+    an HTTP ``status_code`` of 408, 429, or 5xx. Other 4xx responses (bad
+    requests, content-policy rejections) are the caller's problem and must
+    not open a circuit shared by every tenant.
+    """
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        response = getattr(exc, "response", None)
+        status = getattr(response, "status_code", None)
+    if isinstance(status, int):
+        return status >= 500 or status in (408, 429)
+    return True
+
+
+class FallbackRouter:
+    """Route calls along a fallback chain, skipping deployments with open circuits.
+
+    Each deployment has its own breaker and shares a provider-level breaker
+    with other deployments on the same provider, so a provider-wide outage
+    reroutes every chain, including to deployments not yet called. A
+    failure only counts against the provider once at least
+    ``min_failing_deployments`` of its deployments have failed within the
+    provider window, so one broken deployment never takes healthy siblings
+    down with it.
+    Every attempt is bounded by ``timeout_seconds`` so a hanging provider
+    surfaces as a failure instead of stalling the circuit.
+    """
+
+    def __init__(
+        self,
+        config: Optional[CircuitBreakerConfig] = None,
+        provider_config: Optional[CircuitBreakerConfig] = None,
+        *,
+        timeout_seconds: float = 60.0,
+        is_failure: Callable[[BaseException], bool] = is_provider_failure,
+        min_failing_deployments: int = 2,
+        clock: Clock = time.monotonic,
+        metrics: Optional[CircuitMetrics] = None,
+    ) -> None:
+        if not (math.isfinite(timeout_seconds) and timeout_seconds > 0):
+            raise ValueError(f"timeout_seconds must be a positive finite number, got {timeout_seconds!r}")
+        self.config = config or CircuitBreakerConfig()
+        self.provider_config = provider_config or self.config
+        self.min_failing_deployments = min_failing_deployments
+        self.timeout_seconds = timeout_seconds
+        self.is_failure = is_failure
+        self.metrics = metrics or CircuitMetrics()
+        self._clock = clock
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._failing_deployments: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, name: str, config: Optional[CircuitBreakerConfig] = None) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(name)
+                if breaker is None:
+                    breaker = CircuitBreaker(
+                        name,
+                        config or self.config,
+                        clock=self._clock,
+                        on_state_change=self.metrics,
+                    )
+                    self._breakers[breaker.name] = breaker
+        return breaker
+
+    async def call(
+        self,
+        chain: Sequence[Deployment],
+        request: Callable[[Deployment], Awaitable[T]],
+    ) -> T:
+        """Invoke ``request`` on the first healthy deployment in ``chain``.
+
+        Exceptions rejected by ``is_failure`` are re-raised immediately
+        without touching any circuit or trying the next deployment.
+        """
+        errors: Dict[str, BaseException] = {}
+        for deployment in chain:
+            provider_breaker = self.breaker(f"provider:{deployment.provider}", self.provider_config)
+            deployment_breaker = self.breaker(f"deployment:{deployment.key}")
+            provider_permit = provider_breaker.allow_request()
+            if provider_permit is None:
+                continue
+            deployment_permit = deployment_breaker.allow_request()
+            if deployment_permit is None:
+                provider_breaker.cancel_request(provider_permit)
+                continue
+            started = self._clock()
+            try:
+                result = await asyncio.wait_for(request(deployment), self.timeout_seconds)
+            except asyncio.CancelledError:
+                deployment_breaker.cancel_request(deployment_permit)
+                provider_breaker.cancel_request(provider_permit)
+                raise
+            except Exception as exc:
+                if not self.is_failure(exc):
+                    deployment_breaker.cancel_request(deployment_permit)
+                    provider_breaker.cancel_request(provider_permit)
+                    raise
+                latency_ms = (self._clock() - started) * 1000
+                accepted = deployment_breaker.record_failure(deployment_permit, latency_ms)
+                if accepted and self._failure_spans_deployments(deployment):
+                    provider_breaker.record_failure(provider_permit, latency_ms)
+                else:
+                    provider_breaker.cancel_request(provider_permit)
+                errors[deployment.key] = exc
+                continue
+            latency_ms = (self._clock() - started) * 1000
+            deployment_breaker.record_success(deployment_permit, latency_ms)
+            provider_breaker.record_success(provider_permit, latency_ms)
+            return result
+        raise AllDeploymentsUnavailableError(errors)
+
+    def _failure_spans_deployments(self, deployment: Deployment) -> bool:
+        now = self._clock()
+        horizon = now - self.provider_config.window_seconds
+        with self._lock:
+            failing = self._failing_deployments.setdefault(deployment.provider, {})
+            failing[deployment.key] = now
+            for key in [key for key, seen in failing.items() if seen < horizon]:
+                del failing[key]
+            return len(failing) >= self.min_failing_deployments
+
+    def states(self) -> List[Tuple[str, CircuitState]]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return [(breaker.name, breaker.state) for breaker in breakers]
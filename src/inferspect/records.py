@@ -0,0 +1,275 @@
+"""Compact record types for buffering proxy request/response telemetry."""
+
+from __future__ import annotations
+
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional
+
+__all__ = (
+    "IdentifierTable",
+    "RequestRecord",
+    "TraceEvent",
+    "UsageBatch",
+    "UsageRecord",
+    "intern_identifier",
+)
+
+
+def intern_identifier(value: str) -> str:
+    """Return the interned copy of a tenant, model, or provider identifier."""
+    return sys.intern(str(value))
+
+
+@dataclass(slots=True)
+class RequestRecord:
+    """Metadata captured when a request enters the proxy."""
+
+    request_id: str
+    tenant_id: str
+    model: str
+    provider: str
+    started_at: float
+
+    def __post_init__(self) -> None:
+        self.tenant_id = intern_identifier(self.tenant_id)
+        self.model = intern_identifier(self.model)
+        self.provider = intern_identifier(self.provider)
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "RequestRecord":
+        return cls(
+            request_id=str(data["request_id"]),
+            tenant_id=data["tenant_id"],
+            model=data["model"],
+            provider=data.get("provider") or "unknown",
+            started_at=float(data["started_at"]),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "request_id": self.request_id,
+            "tenant_id": self.tenant_id,
+            "model": self.model,
+            "provider": self.provider,
+            "started_at": self.started_at,
+        }
+
+
+@dataclass(slots=True)
+class UsageRecord:
+    """Token usage and cost reported once a response completes."""
+
+    request_id: str
+    tenant_id: str
+    model: str
+    timestamp: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    latency_ms: float = 0.0
+
+    def __post_init__(self) -> None:
+        self.tenant_id = intern_identifier(self.tenant_id)
+        self.model = intern_identifier(self.model)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "UsageRecord":
+        return cls(
+            request_id=str(data["request_id"]),
+            tenant_id=data["tenant_id"],
+            model=data["model"],
+            timestamp=float(data["timestamp"]),
+            prompt_tokens=int(data.get("prompt_tokens") or 0),
+            completion_tokens=int(data.get("completion_tokens") or 0),
+            cost_usd=float(data.get("cost_usd") or 0.0),
+            latency_ms=float(data.get("latency_ms") or 0.0),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "request_id": self.request_id,
+            "tenant_id": self.tenant_id,
+            "model": self.model,
+            "timestamp": self.timestamp,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": self.cost_usd,
+            "latency_ms": self.latency_ms,
+        }
+
+
+@dataclass(slots=True)
+class TraceEvent:
+    """A single timed span emitted while serving a request."""
+
+    trace_id: str
+    name: str
+    tenant_id: str
+    timestamp: float
+    duration_ms: float = 0.0
+    status: str = "ok"
+
+    def __post_init__(self) -> None:
+        self.name = intern_identifier(self.name)
+        self.tenant_id = intern_identifier(self.tenant_id)
+        self.status = intern_identifier(self.status)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "tenant_id": self.tenant_id,
+            "timestamp": self.timestamp,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+        }
+
+
+class IdentifierTable:
+    """Map repeated identifiers to dense integer codes."""
+
+    __slots__ = ("_codes", "_values")
+
+    def __init__(self) -> None:
+        self._codes: Dict[str, int] = {}
+        self._values: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def encode(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            value = intern_identifier(value)
+            code = len(self._values)
+            self._codes[value] = code
+            self._values.append(value)
+        return code
+
+    def decode(self, code: int) -> str:
+        return self._values[code]
+
+    @property
+    def values(self) -> List[str]:
+        return list(self._values)
+
+
+class UsageBatch:
+    """Column-oriented buffer of usage records backed by ``array.array``.
+
+    Numeric fields live in typed arrays and tenant/model identifiers are
+    stored as codes into shared :class:`IdentifierTable` instances. Request
+    ids are packed as UTF-8 bytes plus an offsets column (the Arrow string
+    layout), so every column, ids included, can be exported through
+    :meth:`to_buffers`. With short request ids a buffered record costs
+    roughly 80 bytes, versus several hundred for a ``dict``.
+    """
+
+    __slots__ = (
+        "tenants",
+        "models",
+        "request_id_data",
+        "request_id_offsets",
+        "tenant_codes",
+        "model_codes",
+        "timestamps",
+        "prompt_tokens",
+        "completion_tokens",
+        "cost_usd",
+        "latency_ms",
+    )
+
+    def __init__(
+        self,
+        tenants: Optional[IdentifierTable] = None,
+        models: Optional[IdentifierTable] = None,
+    ) -> None:
+        self.tenants = tenants if tenants is not None else IdentifierTable()
+        self.models = models if models is not None else IdentifierTable()
+        self.request_id_data = bytearray()
+        self.request_id_offsets = array("q", [0])
+        self.tenant_codes = array("I")
+        self.model_codes = array("I")
+        self.timestamps = array("d")
+        self.prompt_tokens = array("q")
+        self.completion_tokens = array("q")
+        self.cost_usd = array("d")
+        self.latency_ms = array("d")
+
+    def __len__(self) -> int:
+        return len(self.request_id_offsets) - 1
+
+    def __iter__(self) -> Iterator[UsageRecord]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getitem__(self, index: int) -> UsageRecord:
+        return UsageRecord(
+            request_id=self.request_id(index),
+            tenant_id=self.tenants.decode(self.tenant_codes[index]),
+            model=self.models.decode(self.model_codes[index]),
+            timestamp=self.timestamps[index],
+            prompt_tokens=self.prompt_tokens[index],
+            completion_tokens=self.completion_tokens[index],
+            cost_usd=self.cost_usd[index],
+            latency_ms=self.latency_ms[index],
+        )
+
+    def request_id(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("UsageBatch index out of range")
+        start, end = self.request_id_offsets[index], self.request_id_offsets[index + 1]
+        return self.request_id_data[start:end].decode("utf-8")
+
+    def append(self, record: UsageRecord) -> None:
+        self.request_id_data += record.request_id.encode("utf-8")
+        self.request_id_offsets.append(len(self.request_id_data))
+        self.tenant_codes.append(self.tenants.encode(record.tenant_id))
+        self.model_codes.append(self.models.encode(record.model))
+        self.timestamps.append(record.timestamp)
+        self.prompt_tokens.append(record.prompt_tokens)
+        self.completion_tokens.append(record.completion_tokens)
+        self.cost_usd.append(record.cost_usd)
+        self.latency_ms.append(record.latency_ms)
+
+    def extend(self, records: Iterable[UsageRecord]) -> None:
+        for record in records:
+            self.append(record)
+
+    def clear(self) -> None:
+        """Drop buffered rows while keeping the identifier tables."""
+        del self.request_id_data[:]
+        del self.request_id_offsets[1:]
+        for column in self._numeric_columns().values():
+            del column[:]
+
+    def to_buffers(self) -> Dict[str, memoryview]:
+        """Return zero-copy views over every column.
+
+        ``request_id_offsets`` has ``len(self) + 1`` entries delimiting each
+        id inside ``request_id_data``. The views share memory with the batch,
+        so they must be released before the batch is appended to or cleared.
+        """
+        buffers = {name: memoryview(column) for name, column in self._numeric_columns().items()}
+        buffers["request_id_offsets"] = memoryview(self.request_id_offsets)
+        buffers["request_id_data"] = memoryview(self.request_id_data)
+        return buffers
+
+    def _numeric_columns(self) -> Dict[str, array]:
+        return {
+            "tenant_code": self.tenant_codes,
+            "model_code": self.model_codes,
+            "timestamp": self.timestamps,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": self.cost_usd,
+            "latency_ms": self.latency_ms,
+        }
@@ -0,0 +1,232 @@
+"""Tests for the in-memory budget engine."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+from typing import Callable, Dict, List, Mapping, Optional, Set
+
+import pytest
+
+from inferspect.budget import BudgetEngine, BudgetExceededError, PriceTable
+
+
+class FakeSpendStore:
+    def __init__(self, budgets: Optional[Dict[str, float]] = None) -> None:
+        self.budgets = budgets or {}
+        self.totals: Dict[str, float] = {}
+        self.writes: List[str] = []
+        self.failing: Set[str] = set()
+        self.during_write: Optional[Callable[[str], None]] = None
+
+    def load_budgets(self) -> Mapping[str, float]:
+        return dict(self.budgets)
+
+    def load_spend(self) -> Mapping[str, float]:
+        return dict(self.totals)
+
+    def record_spend(self, tenant_id: str, amount: float) -> float:
+        if tenant_id in self.failing:
+            raise ConnectionError("store unavailable")
+        self.writes.append(tenant_id)
+        if self.during_write is not None:
+            self.during_write(tenant_id)
+        self.totals[tenant_id] = self.totals.get(tenant_id, 0.0) + amount
+        return self.totals[tenant_id]
+
+
+@pytest.fixture
+def engine() -> BudgetEngine:
+    prices = PriceTable.from_per_million({"gpt-4o": (2.5, 10.0)})
+    return BudgetEngine(prices)
+
+
+def test_price_table_estimates_per_token_cost(engine: BudgetEngine) -> None:
+    assert engine.estimate("gpt-4o", 1000, 1000) == pytest.approx(0.0125)
+    with pytest.raises(ValueError):
+        engine.estimate("unknown", 1, 1)
+
+
+def test_reserve_enforces_limit(engine: BudgetEngine) -> None:
+    engine.set_limit("acme", 1.0)
+    first = engine.reserve("acme", 0.6)
+    with pytest.raises(BudgetExceededError) as excinfo:
+        engine.reserve("acme", 0.5)
+    assert excinfo.value.available == pytest.approx(0.4)
+    engine.settle(first, 0.2)
+    engine.reserve("acme", 0.5)
+    assert engine.available("acme") == pytest.approx(0.3)
+
+
+def test_unlimited_tenant_always_reserves(engine: BudgetEngine) -> None:
+    engine.reserve("free", 1e9)
+    assert engine.available("free") is None
+
+
+def test_settle_is_idempotent(engine: BudgetEngine) -> None:
+    engine.set_limit("acme", 1.0)
+    reservation = engine.reserve("acme", 0.5)
+    engine.settle(reservation, 0.1)
+    engine.settle(reservation, 0.9)
+    assert engine.snapshot()["acme"] == {"limit": 1.0, "spent": 0.1, "reserved": 0.0}
+
+
+@pytest.mark.parametrize("amount", [-5.0, math.nan, math.inf])
+def test_reserve_rejects_invalid_amounts(engine: BudgetEngine, amount: float) -> None:
+    engine.set_limit("acme", 1.0)
+    with pytest.raises(ValueError):
+        engine.reserve("acme", amount)
+    assert engine.available("acme") == 1.0
+
+
+@pytest.mark.parametrize("cost", [-1.0, math.nan])
+def test_settle_rejects_invalid_cost(engine: BudgetEngine, cost: float) -> None:
+    reservation = engine.reserve("acme", 0.1)
+    with pytest.raises(ValueError):
+        engine.settle(reservation, cost)
+    assert not reservation.settled
+
+
+def test_concurrent_reserve_never_overshoots(engine: BudgetEngine) -> None:
+    engine.set_limit("acme", 100.0)
+    granted: List[int] = []
+    barrier = threading.Barrier(8)
+
+    def worker() -> None:
+        barrier.wait()
+        count = 0
+        for _ in range(5000):
+            try:
+                engine.reserve("acme", 0.01)
+            except BudgetExceededError:
+                continue
+            count += 1
+        granted.append(count)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(granted) * 0.01 <= 100.0 + 1e-9
+    assert engine.snapshot()["acme"]["reserved"] <= 100.0 + 1e-9
+    assert sum(granted) >= 9999
+
+
+def test_reconcile_flushes_and_adopts_store_totals(engine: BudgetEngine) -> None:
+    store = FakeSpendStore(budgets={"acme": 10.0})
+    store.totals["acme"] = 3.0  # written by another replica
+    engine.settle(engine.reserve("acme", 1.0), 0.5)
+    engine.reconcile(store)
+    assert engine.snapshot()["acme"] == {"limit": 10.0, "spent": 3.5, "reserved": 0.0}
+    assert store.totals["acme"] == 3.5
+
+
+def test_reconcile_reads_without_writing_when_nothing_pending(engine: BudgetEngine) -> None:
+    store = FakeSpendStore()
+    engine.set_limit("acme", 10.0)
+    store.totals["acme"] = 4.0
+    engine.reconcile(store)
+    assert store.writes == []
+    assert engine.snapshot()["acme"]["spent"] == 4.0
+
+
+def test_reconcile_keeps_spend_settled_mid_flush(engine: BudgetEngine) -> None:
+    store = FakeSpendStore()
+    engine.settle(engine.reserve("acme", 1.0), 1.0)
+    late = engine.reserve("acme", 1.0)
+    store.during_write = lambda tenant_id: engine.settle(late, 0.25)
+    engine.reconcile(store)
+    assert store.totals["acme"] == 1.0
+    assert engine.snapshot()["acme"]["spent"] == 1.25
+
+    store.during_write = None
+    engine.reconcile(store)
+    assert store.totals["acme"] == 1.25
+    assert engine.snapshot()["acme"]["spent"] == 1.25
+
+
+def test_reconcile_continues_past_failing_tenant(engine: BudgetEngine) -> None:
+    store = FakeSpendStore()
+    store.failing.add("broken")
+    engine.settle(engine.reserve("broken", 1.0), 1.0)
+    engine.settle(engine.reserve("healthy", 1.0), 2.0)
+    with pytest.raises(RuntimeError, match="broken"):
+        engine.reconcile(store)
+    assert store.totals == {"healthy": 2.0}
+
+    store.failing.clear()
+    engine.reconcile(store)
+    assert store.totals == {"healthy": 2.0, "broken": 1.0}
+
+
+def test_concurrent_reconcile_passes_are_serialized(engine: BudgetEngine) -> None:
+    store = FakeSpendStore()
+    engine.settle(engine.reserve("acme", 1.0), 1.0)
+    overlapping: List[threading.Thread] = []
+    blocked: List[bool] = []
+
+    def start_second_pass(tenant_id: str) -> None:
+        if overlapping:
+            return
+        engine.settle(engine.reserve("acme", 1.0), 2.0)
+        worker = threading.Thread(target=engine.reconcile, args=(store,))
+        overlapping.append(worker)
+        worker.start()
+        worker.join(timeout=0.1)
+        blocked.append(worker.is_alive())
+
+    store.during_write = start_second_pass
+    engine.reconcile(store)
+    overlapping[0].join(timeout=5)
+    assert blocked == [True]
+    assert store.totals["acme"] == 3.0
+    assert engine.snapshot()["acme"]["spent"] == 3.0
+
+
+def test_run_reconciliation_loads_store_before_first_interval(engine: BudgetEngine) -> None:
+    store = FakeSpendStore(budgets={"acme": 5.0})
+    store.totals["acme"] = 4.5
+
+    async def scenario() -> None:
+        task = asyncio.create_task(engine.run_reconciliation(store, interval_seconds=3600))
+        for _ in range(200):
+            if engine.available("acme") is not None:
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert engine.available("acme") == pytest.approx(0.5)
+    with pytest.raises(BudgetExceededError):
+        engine.reserve("acme", 1.0)
+
+
+def test_run_reconciliation_survives_store_errors(engine: BudgetEngine) -> None:
+    store = FakeSpendStore(budgets={"acme": 5.0})
+    calls: List[int] = []
+
+    def flaky_load_budgets() -> Mapping[str, float]:
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionError("store unavailable")
+        return dict(store.budgets)
+
+    store.load_budgets = flaky_load_budgets  # type: ignore[method-assign]
+
+    async def scenario() -> None:
+        task = asyncio.create_task(engine.run_reconciliation(store, interval_seconds=0.01))
+        for _ in range(200):
+            if engine.available("acme") is not None:
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert len(calls) >= 2
+    assert engine.available("acme") == 5.0
@@ -0,0 +1,354 @@
+"""Tests for circuit breakers and the fallback router, including fault injection."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from typing import List, Tuple
+
+import pytest
+
+from inferspect.circuit_breaker import (
+    AllDeploymentsUnavailableError,
+    CircuitBreaker,
+    CircuitBreakerConfig,
+    CircuitState,
+    Deployment,
+    FallbackRouter,
+    is_provider_failure,
+)
+
+PRIMARY = Deployment(provider="openai", name="gpt-4o")
+FALLBACK = Deployment(provider="anthropic", name="claude-3-5-sonnet")
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class HttpError(Exception):
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FakeUpstream:
+    """Advance the fake clock by each call's latency; the primary times out during an outage."""
+
+    def __init__(self, clock: FakeClock, timeout_seconds: float) -> None:
+        self.clock = clock
+        self.timeout_seconds = timeout_seconds
+        self.latency_seconds = 0.02
+        self.outage = False
+        self.calls: List[str] = []
+
+    async def __call__(self, deployment: Deployment) -> str:
+        self.calls.append(deployment.key)
+        if deployment == PRIMARY and self.outage:
+            self.clock.advance(self.timeout_seconds)
+            raise asyncio.TimeoutError()
+        self.clock.advance(self.latency_seconds)
+        return deployment.key
+
+
+def trip(breaker: CircuitBreaker, count: int) -> None:
+    for _ in range(count):
+        permit = breaker.allow_request()
+        assert permit is not None
+        breaker.record_failure(permit, 1.0)
+
+
+def test_breaker_opens_half_opens_and_closes() -> None:
+    clock = FakeClock()
+    events: List[Tuple[str, str]] = []
+    config = CircuitBreakerConfig(consecutive_failures=3, open_seconds=10.0, half_open_probes=2)
+    breaker = CircuitBreaker(
+        "b", config, clock=clock, on_state_change=lambda _, old, new: events.append((old.value, new.value))
+    )
+    trip(breaker, 3)
+    assert breaker.state is CircuitState.OPEN
+    assert breaker.allow_request() is None
+
+    clock.advance(10.0)
+    first, second = breaker.allow_request(), breaker.allow_request()
+    assert first is not None and first.probe
+    assert second is not None and second.probe
+    assert breaker.allow_request() is None
+    breaker.record_success(first, 1.0)
+    breaker.record_success(second, 1.0)
+    assert breaker.state is CircuitState.CLOSED
+    assert events == [("closed", "open"), ("open", "half_open"), ("half_open", "closed")]
+
+
+def test_failed_probe_reopens_circuit() -> None:
+    clock = FakeClock()
+    breaker = CircuitBreaker("b", CircuitBreakerConfig(consecutive_failures=1, open_seconds=5.0), clock=clock)
+    trip(breaker, 1)
+    clock.advance(5.0)
+    probe = breaker.allow_request()
+    assert probe is not None
+    breaker.record_failure(probe, 1.0)
+    assert breaker.state is CircuitState.OPEN
+    clock.advance(4.9)
+    assert breaker.state is CircuitState.OPEN
+
+
+def test_error_rate_opens_circuit() -> None:
+    clock = FakeClock()
+    config = CircuitBreakerConfig(min_requests=4, error_rate_threshold=0.5, consecutive_failures=100)
+    breaker = CircuitBreaker("b", config, clock=clock)
+    for failed in (False, True, False, True):
+        permit = breaker.allow_request()
+        assert permit is not None
+        (breaker.record_failure if failed else breaker.record_success)(permit, 1.0)
+    assert breaker.state is CircuitState.OPEN
+
+
+def test_window_forgets_old_failures() -> None:
+    clock = FakeClock()
+    config = CircuitBreakerConfig(window_seconds=10.0, min_requests=2, consecutive_failures=100)
+    breaker = CircuitBreaker("b", config, clock=clock)
+    trip(breaker, 1)
+    clock.advance(11.0)
+    permit = breaker.allow_request()
+    assert permit is not None
+    breaker.record_success(permit, 1.0)
+    assert breaker.state is CircuitState.CLOSED
+
+
+def test_late_outcomes_from_closed_generation_are_ignored() -> None:
+    clock = FakeClock()
+    config = CircuitBreakerConfig(consecutive_failures=2, open_seconds=5.0, half_open_probes=2)
+    breaker = CircuitBreaker("b", config, clock=clock)
+    slow_calls = [breaker.allow_request() for _ in range(4)]
+    trip(breaker, 2)
+    clock.advance(5.0)
+    assert breaker.state is CircuitState.HALF_OPEN
+
+    for permit in slow_calls[:2]:
+        assert permit is not None
+        breaker.record_success(permit, 1.0)
+    assert breaker.state is CircuitState.HALF_OPEN
+    for permit in slow_calls[2:]:
+        assert permit is not None
+        breaker.record_failure(permit, 1.0)
+    assert breaker.state is CircuitState.HALF_OPEN
+
+
+def test_cancelled_probe_frees_its_slot() -> None:
+    clock = FakeClock()
+    config = CircuitBreakerConfig(consecutive_failures=1, open_seconds=1.0, half_open_probes=1)
+    breaker = CircuitBreaker("b", config, clock=clock)
+    trip(breaker, 1)
+    clock.advance(1.0)
+    probe = breaker.allow_request()
+    assert probe is not None
+    assert breaker.allow_request() is None
+    breaker.cancel_request(probe)
+    assert breaker.allow_request() is not None
+
+
+def test_listener_may_read_breaker_state() -> None:
+    clock = FakeClock()
+    router = FallbackRouter(CircuitBreakerConfig(consecutive_failures=1), clock=clock)
+    seen: List[CircuitState] = []
+    breaker = CircuitBreaker(
+        "b",
+        CircuitBreakerConfig(consecutive_failures=1),
+        clock=clock,
+        on_state_change=lambda *_: (seen.append(breaker.state), router.states()),
+    )
+    worker = threading.Thread(target=trip, args=(breaker, 1), daemon=True)
+    worker.start()
+    worker.join(timeout=5)
+    assert not worker.is_alive(), "state listener deadlocked"
+    assert seen == [CircuitState.OPEN]
+
+
+@pytest.mark.parametrize(
+    ("exc", "expected"),
+    [
+        (asyncio.TimeoutError(), True),
+        (ConnectionResetError(), True),
+        (HttpError(503), True),
+        (HttpError(429), True),
+        (HttpError(400), False),
+        (HttpError(403), False),
+        (RuntimeError("boom"), True),
+    ],
+)
+def test_is_provider_failure(exc: BaseException, expected: bool) -> None:
+    assert is_provider_failure(exc) is expected
+
+
+@pytest.mark.parametrize("timeout", [0.0, -1.0, math.inf, math.nan])
+def test_router_requires_finite_timeout(timeout: float) -> None:
+    with pytest.raises(ValueError):
+        FallbackRouter(timeout_seconds=timeout)
+
+
+def test_client_errors_do_not_trip_or_fall_back() -> None:
+    router = FallbackRouter(CircuitBreakerConfig(consecutive_failures=2), clock=FakeClock())
+    calls: List[str] = []
+
+    async def bad_request(deployment: Deployment) -> str:
+        calls.append(deployment.key)
+        raise HttpError(400)
+
+    async def run() -> None:
+        for _ in range(5):
+            with pytest.raises(HttpError):
+                await router.call([PRIMARY, FALLBACK], bad_request)
+
+    asyncio.run(run())
+    assert calls == [PRIMARY.key] * 5
+    assert all(state is CircuitState.CLOSED for _, state in router.states())
+
+
+def test_all_deployments_failing_raises() -> None:
+    router = FallbackRouter(clock=FakeClock())
+
+    async def down(deployment: Deployment) -> str:
+        raise HttpError(502)
+
+    with pytest.raises(AllDeploymentsUnavailableError) as excinfo:
+        asyncio.run(router.call([PRIMARY, FALLBACK], down))
+    assert set(excinfo.value.errors) == {PRIMARY.key, FALLBACK.key}
+
+
+def test_fault_injection_keeps_latency_bounded_and_recovers() -> None:
+    clock = FakeClock()
+    timeout = 30.0
+    config = CircuitBreakerConfig(consecutive_failures=5, open_seconds=15.0, half_open_probes=3)
+    router = FallbackRouter(config, timeout_seconds=timeout, clock=clock)
+    upstream = FakeUpstream(clock, timeout)
+    chain = [PRIMARY, FALLBACK]
+
+    async def serve(count: int) -> List[float]:
+        latencies = []
+        for _ in range(count):
+            started = clock()
+            await router.call(chain, upstream)
+            latencies.append(clock() - started)
+        return latencies
+
+    async def scenario() -> None:
+        healthy = await serve(50)
+        assert max(healthy) <= upstream.latency_seconds
+
+        upstream.outage = True
+        outage = await serve(500)
+        paid_timeout = [latency for latency in outage if latency >= timeout]
+        assert len(paid_timeout) == config.consecutive_failures
+        after_trip = outage[config.consecutive_failures :]
+        assert max(after_trip) <= upstream.latency_seconds
+        assert dict(router.states())[f"deployment:{PRIMARY.key}"] is CircuitState.OPEN
+
+        # Still down when the circuit half-opens: one probe pays, then reopens.
+        clock.advance(config.open_seconds)
+        retry = await serve(20)
+        assert sum(1 for latency in retry if latency >= timeout) == 1
+        assert dict(router.states())[f"deployment:{PRIMARY.key}"] is CircuitState.OPEN
+
+        upstream.outage = False
+        clock.advance(config.open_seconds)
+        upstream.calls.clear()
+        recovered = await serve(10)
+        assert max(recovered) <= upstream.latency_seconds
+        assert upstream.calls == [PRIMARY.key] * 10
+
+    asyncio.run(scenario())
+    assert all(state is CircuitState.CLOSED for _, state in router.states())
+    transitions = {
+        (entry["from"], entry["to"]): entry["count"]
+        for entry in router.metrics.snapshot()["transitions"]
+        if entry["circuit"] == f"deployment:{PRIMARY.key}"
+    }
+    assert transitions == {
+        ("closed", "open"): 1,
+        ("open", "half_open"): 2,
+        ("half_open", "open"): 1,
+        ("half_open", "closed"): 1,
+    }
+
+
+def test_hanging_provider_trips_through_timeout() -> None:
+    router = FallbackRouter(CircuitBreakerConfig(consecutive_failures=2), timeout_seconds=0.02)
+
+    async def hang_primary(deployment: Deployment) -> str:
+        if deployment == PRIMARY:
+            await asyncio.sleep(3600)
+        return deployment.key
+
+    async def scenario() -> float:
+        for _ in range(2):
+            assert await router.call([PRIMARY, FALLBACK], hang_primary) == FALLBACK.key
+        started = time.perf_counter()
+        assert await router.call([PRIMARY, FALLBACK], hang_primary) == FALLBACK.key
+        return time.perf_counter() - started
+
+    assert asyncio.run(scenario()) < 0.02
+
+
+def test_one_failing_deployment_does_not_open_its_provider() -> None:
+    clock = FakeClock()
+    config = CircuitBreakerConfig(consecutive_failures=5, min_requests=4, open_seconds=15.0)
+    router = FallbackRouter(config, clock=clock)
+    broken = Deployment(provider="openai", name="gpt-4o")
+    healthy = Deployment(provider="openai", name="gpt-4o-mini")
+
+    async def upstream(deployment: Deployment) -> str:
+        clock.advance(0.01)
+        if deployment == broken:
+            raise ConnectionError("reset")
+        return deployment.key
+
+    async def scenario() -> None:
+        for _ in range(4):
+            for _ in range(10):
+                with pytest.raises(AllDeploymentsUnavailableError):
+                    await router.call([broken], upstream)
+            for _ in range(3):
+                assert await router.call([healthy], upstream) == healthy.key
+            clock.advance(config.open_seconds)
+
+    asyncio.run(scenario())
+    states = dict(router.states())
+    assert states["provider:openai"] is CircuitState.CLOSED
+    assert states[f"deployment:{healthy.key}"] is CircuitState.CLOSED
+    assert states[f"deployment:{broken.key}"] is not CircuitState.CLOSED
+
+
+def test_failures_across_deployments_open_the_provider() -> None:
+    clock = FakeClock()
+    router = FallbackRouter(CircuitBreakerConfig(consecutive_failures=3), clock=clock)
+    first = Deployment(provider="openai", name="gpt-4o")
+    second = Deployment(provider="openai", name="gpt-4o-mini")
+    untried = Deployment(provider="openai", name="o1")
+    calls: List[str] = []
+
+    async def upstream(deployment: Deployment) -> str:
+        calls.append(deployment.key)
+        clock.advance(0.01)
+        if deployment.provider == "openai":
+            raise ConnectionError("provider down")
+        return deployment.key
+
+    async def scenario() -> None:
+        for _ in range(3):
+            with pytest.raises(AllDeploymentsUnavailableError):
+                await router.call([first, second], upstream)
+        assert await router.call([untried, FALLBACK], upstream) == FALLBACK.key
+
+    asyncio.run(scenario())
+    assert dict(router.states())["provider:openai"] is CircuitState.OPEN
+    assert untried.key not in calls
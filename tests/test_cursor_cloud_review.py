@@ -0,0 +1,149 @@
+"""Tests for incremental review helpers in scripts/cursor_cloud_review.py."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+from pathlib import Path
+
+import pytest
+
+import cursor_cloud_review as review
+
+
+def git(repo: Path, *args: str) -> str:
+    result = subprocess.run(
+        ["git", *args], cwd=repo, check=True, capture_output=True, text=True
+    )
+    return result.stdout.strip()
+
+
+def commit(repo: Path, name: str, content: str) -> str:
+    (repo / name).write_text(content, encoding="utf-8")
+    git(repo, "add", name)
+    git(repo, "commit", "-q", "-m", f"update {name}")
+    return git(repo, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def repo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    git(tmp_path, "init", "-q", "-b", "main")
+    git(tmp_path, "config", "user.email", "tests@example.com")
+    git(tmp_path, "config", "user.name", "tests")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_resolve_incremental_base_uses_ancestor(repo: Path) -> None:
+    first = commit(repo, "a.py", "a = 1\n")
+    second = commit(repo, "b.py", "b = 1\n")
+    assert review.resolve_incremental_base({"head_sha": first}, second) == first
+    assert review.gather_changed_files(first, second, merge_base=False) == ["b.py"]
+
+
+def test_incremental_files_exclude_changes_merged_from_base(repo: Path) -> None:
+    commit(repo, "README", "base\n")
+    git(repo, "checkout", "-q", "-b", "feature")
+    reviewed = commit(repo, "p", "pr change\n")
+    git(repo, "checkout", "-q", "main")
+    for name in ("m1", "m2", "m3"):
+        commit(repo, name, "upstream\n")
+    git(repo, "checkout", "-q", "feature")
+    git(repo, "merge", "-q", "--no-edit", "main")
+    merged = git(repo, "rev-parse", "HEAD")
+
+    assert review.resolve_incremental_base({"head_sha": reviewed}, merged) == reviewed
+    assert review.gather_changed_files(reviewed, merged, merge_base=False) == ["m1", "m2", "m3"]
+    assert review.gather_incremental_files(reviewed, "main", merged) == []
+
+    follow_up = commit(repo, "q", "more pr work\n")
+    assert review.gather_incremental_files(reviewed, "main", follow_up) == ["q"]
+
+
+def test_load_prior_findings_normalizes_artifact_entries() -> None:
+    previous = {"findings": [{"title": "x"}, "junk", {"severity": "High"}, {"id": "a", "title": "y"}]}
+    assert review.load_prior_findings(previous) == [
+        {"title": "x", "id": "-::x"},
+        {"id": "a", "title": "y"},
+    ]
+
+
+def test_resolve_incremental_base_falls_back_after_rewrite(repo: Path) -> None:
+    base = commit(repo, "a.py", "a = 1\n")
+    rewritten = commit(repo, "b.py", "b = 1\n")
+    git(repo, "reset", "-q", "--hard", base)
+    new_head = commit(repo, "c.py", "c = 1\n")
+    assert review.resolve_incremental_base({"head_sha": rewritten}, new_head) is None
+
+
+def test_resolve_incremental_base_without_new_commits(repo: Path) -> None:
+    head = commit(repo, "a.py", "a = 1\n")
+    assert review.resolve_incremental_base({"head_sha": head}, head) is None
+    assert review.resolve_incremental_base(None, head) is None
+
+
+def test_load_previous_review_requires_success(tmp_path: Path) -> None:
+    path = tmp_path / "meta.json"
+    path.write_text(json.dumps({"status": "FAILED", "head_sha": "abc"}), encoding="utf-8")
+    assert review.load_previous_review(path) is None
+    path.write_text(json.dumps({"status": "finished", "head_sha": "abc"}), encoding="utf-8")
+    assert review.load_previous_review(path) == {"status": "finished", "head_sha": "abc"}
+    path.write_text("{not json", encoding="utf-8")
+    assert review.load_previous_review(path) is None
+    assert review.load_previous_review(tmp_path / "missing.json") is None
+
+
+def test_extract_findings_parses_block() -> None:
+    findings_block = {
+        "findings": [
+            {"id": "auth", "severity": "High", "file": "app.py", "title": "Missing auth"},
+            {"file": "db.py", "title": "SQL Injection"},
+            {"severity": "Low"},
+        ],
+        "resolved": ["old", ""],
+    }
+    markdown = f"# Report\n\n```cursor-findings\n{json.dumps(findings_block)}\n```\n"
+    findings, resolved = review.extract_findings(markdown)
+    assert findings == [
+        {"severity": "High", "file": "app.py", "title": "Missing auth", "id": "auth"},
+        {"severity": "Low", "file": "db.py", "title": "SQL Injection", "id": "db.py::sql injection"},
+    ]
+    assert resolved == ["old"]
+
+
+@pytest.mark.parametrize(
+    "markdown",
+    ["no block", "```cursor-findings\nnot json\n```", "```cursor-findings\n[]\n```"],
+)
+def test_extract_findings_tolerates_bad_blocks(markdown: str) -> None:
+    assert review.extract_findings(markdown) == ([], [])
+
+
+def test_merge_findings_drops_resolved_and_dedupes() -> None:
+    previous = [{"id": "old", "title": "Old"}, {"title": "Keep", "file": "k.py"}]
+    new = [{"id": "k.py::keep", "title": "Keep", "file": "k.py", "severity": "High"}]
+    merged = review.merge_findings(previous, new, ["old"])
+    assert merged == [{"id": "k.py::keep", "title": "Keep", "file": "k.py", "severity": "High"}]
+
+
+def test_build_prompt_handles_prior_findings_without_ids() -> None:
+    prompt = review.build_prompt(
+        repo_url="https://github.com/o/r",
+        pr_number="1",
+        base_ref="main",
+        base_sha="base",
+        head_ref="feature",
+        head_sha="new",
+        changed_files=["a.py"],
+        previous_head_sha="old",
+        prior_findings=[{"title": "x"}],
+    )
+    assert "Delta under review: old..new" in prompt
+    assert "- [-::x] Low: x" in prompt
+    assert "cursor-findings" in prompt
+
+
+def test_build_prompt_full_review_lists_changed_files() -> None:
+    prompt = review.build_prompt("https://github.com/o/r", "1", "main", "b", "f", "h", ["a.py", "b.py"])
+    assert "Perform a holistic analysis" in prompt
+    assert "- a.py\n- b.py" in prompt
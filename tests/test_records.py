@@ -0,0 +1,132 @@
+"""Tests for the compact telemetry record types."""
+
+from __future__ import annotations
+
+import pytest
+
+from inferspect.records import (
+    IdentifierTable,
+    RequestRecord,
+    TraceEvent,
+    UsageBatch,
+    UsageRecord,
+    intern_identifier,
+)
+
+
+def make_usage(index: int) -> UsageRecord:
+    return UsageRecord(
+        request_id=f"req-{index}",
+        tenant_id=f"tenant-{index % 2}",
+        model="gpt-4o",
+        timestamp=1000.0 + index,
+        prompt_tokens=10 * index,
+        completion_tokens=index,
+        cost_usd=0.5 * index,
+        latency_ms=2.0 * index,
+    )
+
+
+def test_usage_record_round_trips_through_dict() -> None:
+    record = make_usage(3)
+    assert UsageRecord.from_dict(record.to_dict()) == record
+    assert record.total_tokens == 33
+
+
+def test_request_record_defaults_missing_provider() -> None:
+    record = RequestRecord.from_dict(
+        {"request_id": 7, "tenant_id": "acme", "model": "gpt-4o", "started_at": "1.5"}
+    )
+    assert record.request_id == "7"
+    assert record.provider == "unknown"
+    assert record.started_at == 1.5
+    assert RequestRecord.from_dict(record.to_dict()) == record
+
+
+def test_records_intern_identifiers() -> None:
+    tenant = "".join(["ac", "me"])
+    record = UsageRecord("r", tenant, "".join(["gpt-", "4o"]), 0.0)
+    event = TraceEvent("t", "".join(["up", "stream"]), tenant, 0.0)
+    assert record.tenant_id is intern_identifier("acme")
+    assert record.model is intern_identifier("gpt-4o")
+    assert event.tenant_id is record.tenant_id
+    assert event.name is intern_identifier("upstream")
+
+
+def test_records_have_no_instance_dict() -> None:
+    assert not hasattr(make_usage(1), "__dict__")
+    assert not hasattr(UsageBatch(), "__dict__")
+
+
+def test_identifier_table_assigns_dense_codes() -> None:
+    table = IdentifierTable()
+    assert [table.encode(value) for value in ("a", "b", "a", "c")] == [0, 1, 0, 2]
+    assert table.decode(1) == "b"
+    assert table.values == ["a", "b", "c"]
+    assert len(table) == 3
+
+
+def test_usage_batch_indexing_and_iteration() -> None:
+    records = [make_usage(index) for index in range(5)]
+    batch = UsageBatch()
+    batch.extend(records)
+    assert len(batch) == 5
+    assert batch[2] == records[2]
+    assert batch[-1] == records[-1]
+    assert list(batch) == records
+    assert len(batch.tenants) == 2
+
+
+def test_usage_batch_request_id_out_of_range() -> None:
+    batch = UsageBatch()
+    batch.append(make_usage(0))
+    with pytest.raises(IndexError):
+        batch.request_id(1)
+
+
+def test_usage_batch_to_buffers_exports_typed_columns() -> None:
+    batch = UsageBatch()
+    batch.extend(make_usage(index) for index in range(4))
+    buffers = batch.to_buffers()
+    expected_formats = {
+        "tenant_code": "I",
+        "model_code": "I",
+        "timestamp": "d",
+        "prompt_tokens": "q",
+        "completion_tokens": "q",
+        "cost_usd": "d",
+        "latency_ms": "d",
+        "request_id_offsets": "q",
+        "request_id_data": "B",
+    }
+    assert {name: view.format for name, view in buffers.items()} == expected_formats
+    for name, view in buffers.items():
+        if name == "request_id_offsets":
+            assert len(view) == 5
+        elif name != "request_id_data":
+            assert len(view) == 4
+    assert buffers["prompt_tokens"].tolist() == [0, 10, 20, 30]
+    offsets = buffers["request_id_offsets"].tolist()
+    data = buffers["request_id_data"].tobytes()
+    assert data[offsets[1] : offsets[2]] == b"req-1"
+    for view in buffers.values():
+        view.release()
+
+
+def test_usage_batch_buffers_share_memory() -> None:
+    batch = UsageBatch()
+    batch.append(make_usage(1))
+    view = batch.to_buffers()["cost_usd"]
+    batch.cost_usd[0] = 9.0
+    assert view[0] == 9.0
+    view.release()
+
+
+def test_usage_batch_clear_keeps_identifier_tables() -> None:
+    batch = UsageBatch()
+    batch.extend(make_usage(index) for index in range(3))
+    batch.clear()
+    assert len(batch) == 0
+    assert len(batch.tenants) == 2
+    batch.append(make_usage(7))
+    assert batch[0].request_id == "req-7"